@@ -196,6 +196,7 @@ class Benchmark:
         self.max_rows = max_rows
         self.loops = loops
         self.sorted = sorted
+        self.random = random.Random(4711)  # a local generator, the global random state is left untouched
         self.data_template = {"pandas": { "s": [], "m": [], "l": [], "xl": [], "hk": [] },
                      "nanocube_roaring": { "s": [], "m": [], "l": [], "xl": [], "hk": [] },
                         "nanocube_numpy": { "s": [], "m": [], "l": [], "xl": [], "hk": [] },
@@ -232,14 +233,14 @@ class Benchmark:
         }
 
     def generate_data(self, rows):
-        random.seed(4711)
-        df = pd.DataFrame({'promo':    random.choices([True, False], k=rows),
-                           'customer': random.choices(string.ascii_uppercase, weights=range(len(string.ascii_uppercase), 0, -1), k=rows),
-                           'segment':  random.choices([f'S{i}' for i in range(10)], weights=range(10, 0, -1), k=rows),
-                           'category': random.choices([f'C{i}' for i in range(100)], weights=range(100, 0, -1), k=rows),
-                           'product':  random.choices([f'P{i}' for i in range(1000)], k=rows),
-                           'date':     random.choices([datetime.date.today() - datetime.timedelta(days=i) for i in range(364)], k=rows),
-                           'orderid':    random.choices([f'O{i}' for i in range(10000)], k=rows),
+        self.random.seed(4711)  # each data set and its queries are reproducible
+        df = pd.DataFrame({'promo':    self.random.choices([True, False], k=rows),
+                           'customer': self.random.choices(string.ascii_uppercase, weights=range(len(string.ascii_uppercase), 0, -1), k=rows),
+                           'segment':  self.random.choices([f'S{i}' for i in range(10)], weights=range(10, 0, -1), k=rows),
+                           'category': self.random.choices([f'C{i}' for i in range(100)], weights=range(100, 0, -1), k=rows),
+                           'product':  self.random.choices([f'P{i}' for i in range(1000)], k=rows),
+                           'date':     self.random.choices([datetime.date.today() - datetime.timedelta(days=i) for i in range(364)], k=rows),
+                           'orderid':    self.random.choices([f'O{i}' for i in range(10000)], k=rows),
                            'sales':    [1 for _ in range(rows)],
                            'cost':     [1 for _ in range(rows)]})
         members = dict([(col, df[col].unique()) for col in df.columns])
@@ -322,8 +323,8 @@ class Benchmark:
 
         elif size == "m":
             # Query for ±0.1% of the records
-            product = random.choice(members["product"])
-            segment = random.choice(members["segment"])
+            product = self.random.choice(members["product"])
+            segment = self.random.choice(members["segment"])
             pandas_query = f"df[(df['product'] == '{product}') & (df['segment'] == '{segment}')]['sales'].sum()"
             p_value = eval(pandas_query)
             # cube query
@@ -334,14 +335,14 @@ class Benchmark:
 
         elif size == "l":
             # Query for ±5% of the records
-            segment = random.choice(members["segment"])
+            segment = self.random.choice(members["segment"])
 
             pandas_query = f"df[(df['promo'] == True) & (df['segment'] == '{segment}')]['sales'].sum()"
             cube_query = f"nc_r.get('sales', segment='{segment}', promo=True)"
 
             quote = "'"
-            categories = [x for x in random.choices(members['category'], k=1)]
-            categories_text = f"[{', '.join([quote + x + quote for x in random.choices(members['category'], k=1)])}, ]"
+            categories = [x for x in self.random.choices(members['category'], k=1)]
+            categories_text = f"[{', '.join([quote + x + quote for x in self.random.choices(members['category'], k=1)])}, ]"
             pandas_query = (f"df[(df['promo'] == True) & "
                             f"(df['segment'] == '{segment}') & "
                             f"(df['category'].isin({categories})) ]['sales'].sum()")
@@ -364,8 +365,8 @@ class Benchmark:
 
         elif size == "hk":
             # Query for single column value with high cardinality
-            product = random.choice(members["product"])
-            order = random.choice(members["orderid"])
+            product = self.random.choice(members["product"])
+            order = self.random.choice(members["orderid"])
             pandas_query = f"df[(df['product'] == '{product}') & (df['orderid'] == '{order}')]['sales'].sum()"
             p_value = eval(pandas_query)
             # cube query
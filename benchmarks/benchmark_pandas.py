@@ -22,6 +22,7 @@ class Benchmark:
         self.max_rows = max_rows
         self.loops = loops
         self.sorted = sorted
+        self.random = random.Random(4711)  # a local generator, the global random state is left untouched
         self.data = {"pandas": { "s": [], "m": [], "l": [], "xl": [], "hk": [] },
                         "cube": {"s": [], "m": [], "l": [], "xl": [], "hk": [] },
                         "cube2": {"s": [], "m": [], "l": [], "xl": [], "hk": [] },
@@ -30,14 +31,14 @@ class Benchmark:
                         "count": {"s": [], "m": [], "l": [], "xl": [], "hk": [] }}
 
     def generate_data(self, rows):
-        random.seed(4711)
-        df = pd.DataFrame({'promo':    random.choices([True, False], k=rows),
-                           'customer': random.choices(string.ascii_uppercase, weights=range(len(string.ascii_uppercase), 0, -1), k=rows),
-                           'segment':  random.choices([f'S{i}' for i in range(10)], weights=range(10, 0, -1), k=rows),
-                           'category': random.choices([f'C{i}' for i in range(100)], weights=range(100, 0, -1), k=rows),
-                           'product':  random.choices([f'P{i}' for i in range(1000)], k=rows),
-                           'date':     random.choices([datetime.date.today() - datetime.timedelta(days=i) for i in range(364)], k=rows),
-                           'order':    random.choices([f'O{i}' for i in range(10000)], k=rows),
+        self.random.seed(4711)  # each data set and its queries are reproducible
+        df = pd.DataFrame({'promo':    self.random.choices([True, False], k=rows),
+                           'customer': self.random.choices(string.ascii_uppercase, weights=range(len(string.ascii_uppercase), 0, -1), k=rows),
+                           'segment':  self.random.choices([f'S{i}' for i in range(10)], weights=range(10, 0, -1), k=rows),
+                           'category': self.random.choices([f'C{i}' for i in range(100)], weights=range(100, 0, -1), k=rows),
+                           'product':  self.random.choices([f'P{i}' for i in range(1000)], k=rows),
+                           'date':     self.random.choices([datetime.date.today() - datetime.timedelta(days=i) for i in range(364)], k=rows),
+                           'order':    self.random.choices([f'O{i}' for i in range(10000)], k=rows),
                            'sales':    [1 for _ in range(rows)],
                            'cost':     [1 for _ in range(rows)]})
         members = dict([(col, df[col].unique()) for col in df.columns])
@@ -126,8 +127,8 @@ class Benchmark:
 
         elif size == "m":
             # Query for ±0.1% of the records
-            product = random.choice(members["product"])
-            segment = random.choice(members["segment"])
+            product = self.random.choice(members["product"])
+            segment = self.random.choice(members["segment"])
             pandas_query = f"df[(df['product'] == '{product}') & (df['segment'] == '{segment}')]['sales'].sum()"
             p_value = eval(pandas_query)
             # cube query
@@ -136,13 +137,13 @@ class Benchmark:
 
         elif size == "l":
             # Query for ±5% of the records
-            segment = random.choice(members["segment"])
+            segment = self.random.choice(members["segment"])
 
             pandas_query = f"df[(df['promo'] == True) & (df['segment'] == '{segment}')]['sales'].sum()"
             cube_query = f"c_roaring.get('sales', segment='{segment}', promo=True)"
 
             quote = "'"
-            categories = f"[{', '.join([quote + x + quote for x in random.choices(members['category'], k=1)])}, ]"
+            categories = f"[{', '.join([quote + x + quote for x in self.random.choices(members['category'], k=1)])}, ]"
             pandas_query = (f"df[(df['promo'] == True) & "
                             f"(df['segment'] == '{segment}') & "
                             f"(df['category'].isin({categories})) ]['sales'].sum()")
@@ -161,8 +162,8 @@ class Benchmark:
 
         elif size == "hk":
             # Query for single column value with high cardinality
-            product = random.choice(members["product"])
-            order = random.choice(members["order"])
+            product = self.random.choice(members["product"])
+            order = self.random.choice(members["order"])
             pandas_query = f"df[(df['product'] == '{product}') & (df['order'] == '{order}')]['sales'].sum()"
             p_value = eval(pandas_query)
             # cube query
@@ -3,6 +3,10 @@ from nanocube import NanoCube
 
 import numpy as np
 import pandas as pd
+try:
+    from numba import njit  # optional, only used by the compiled full-scan reference
+except ImportError:
+    njit = None
 from numpy import ndarray
 from timeit import timeit
 from pathlib import Path
@@ -18,6 +22,8 @@ nc:NanoCube|None = None
 
 df:pd.DataFrame = pd.DataFrame()
 mask:np.ndarray = np.array([])
+codes:np.ndarray = np.array([])
+targets:np.ndarray = np.array([])
 
 def pandas_load():
     global df, mask
@@ -42,6 +48,47 @@ def numpy_sort():
     global df
     df.sort_values(by=['model', 'make', 'trim', 'body'], inplace=True)
 
+def numba_prepare():
+    global df, codes, targets
+    dimensions, members = ['model', 'make', 'trim', 'body'], ['Optima', 'Kia', 'LX', 'Sedan']
+    factorized = [pd.factorize(df[d]) for d in dimensions]
+    codes = np.stack([c for c, _ in factorized])
+    targets = np.array([u.get_loc(m) for (_, u), m in zip(factorized, members)], dtype=codes.dtype)
+
+def _filtered_sum(codes, targets, values):
+    total = 0.0
+    for i in range(values.shape[0]):
+        match = True
+        for d in range(targets.shape[0]):
+            if codes[d, i] != targets[d]:
+                match = False
+                break
+        if match and values[i] == values[i]:  # skip NaNs, like nansum
+            total += values[i]
+    return total
+if njit is not None:
+    _filtered_sum = njit(cache=True)(_filtered_sum)
+
+def numba_filtered_scan(loops=1000):
+    # compiled full scan over the factorized dimensions, the best case for a filtered sum without an index
+    value = 0
+    array = df['mmr'].to_numpy()
+    for _ in range(loops):
+        value += _filtered_sum(codes, targets, array)
+    return value
+
+def nanocube_all_makes():
+    # one point query per make
+    return {make: nc.get('mmr', make=make) for make in df['make'].dropna().unique()}
+
+def numpy_reduceat_all_makes():
+    # all makes in one pass: group the rows by make, then sum each group with np.add.reduceat
+    codes, makes = pd.factorize(df['make'])
+    order = np.argsort(codes, kind='stable')
+    starts = np.searchsorted(codes[order], np.arange(len(makes)))
+    sums = np.add.reduceat(np.nan_to_num(df['mmr'].to_numpy()[order]), starts)
+    return dict(zip(makes, sums.tolist()))
+
 def query_nanocube(loops=1000):
     value = 0
     for _ in range(loops):
@@ -105,4 +152,23 @@ if __name__ == '__main__':
     numpy_time = timeit(numpy_masked_sum, number=1)
     print(f"Numpy {loops}x masked sum in {numpy_time:.5f} sec., "
           f"{loops/numpy_time:.0f} queries/sec."
-          f" {loops * len(mask) / 1_000_000 / numpy_time:.0f}M aggs/sec.")
\ No newline at end of file
+          f" {loops * len(mask) / 1_000_000 / numpy_time:.0f}M aggs/sec.")
+
+    if njit is not None:
+        numba_prepare()
+        numba_filtered_scan(loops=1)  # compile
+        numba_time = timeit(numba_filtered_scan, number=1)
+        print(f"Numba {loops}x filtered scan (4 filters, no index) in {numba_time:.5f} sec., "
+              f"{loops/numba_time:.0f} queries/sec."
+              f" {loops * records / 1_000_000 / numba_time:.0f}M rows/sec.")
+        assert(abs(numba_filtered_scan(loops=1) - query_nanocube(loops=1)) < 1e-6)
+    else:
+        print("Numba filtered scan skipped, numba is not installed.")
+
+    makes = df['make'].nunique()
+    nc_time = timeit(nanocube_all_makes, number=1)
+    print(f"\nNanoCube sum per make, {makes}x point queries in {nc_time:.5f} sec.")
+    numpy_time = timeit(numpy_reduceat_all_makes, number=1)
+    print(f"Numpy sum per make, one pass with np.add.reduceat in {numpy_time:.5f} sec.")
+    expected = numpy_reduceat_all_makes()
+    assert(all(abs(value - expected[make]) < 1e-6 for make, value in nanocube_all_makes().items()))
\ No newline at end of file
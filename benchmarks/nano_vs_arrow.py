@@ -12,7 +12,8 @@ import os
 
 # Create a DataFrame and NanoCube
 file_car_prices = Path(os.path.dirname(os.path.realpath(__file__))) / "files" / "car_prices.parquet"
-df = pd.read_parquet(file_car_prices)
+columns = ['make', 'model', 'trim', 'body', 'mmr']  # only the columns used by the queries
+df = pd.read_parquet(file_car_prices, columns=columns)
 df.sort_values(by=['model', 'make', 'trim', 'body'], inplace=True)
 
 
@@ -20,7 +21,7 @@ df.sort_values(by=['model', 'make', 'trim', 'body'], inplace=True)
 nc = NanoCube(df, dimensions=['make', 'model', 'trim', 'body'], measures=['mmr'], caching=False)
 
 # Create a pyarrow table
-pat = pq.read_table(file_car_prices)
+pat = pq.read_table(file_car_prices, columns=columns)
 pat.sort_by([('model', 'ascending') , ('make', 'ascending') , ('trim', 'ascending') , ('body', 'ascending')])
 
 
@@ -8,7 +8,8 @@ import os
 
 # Initialize DataFrame and NanoCube
 file_car_prices = Path(os.path.dirname(os.path.realpath(__file__))) / "files" / "car_prices.parquet"
-df = pd.read_parquet(file_car_prices)
+columns = ['make', 'model', 'trim', 'body', 'mmr']  # only the columns used by the queries
+df = pd.read_parquet(file_car_prices, columns=columns)
 df.sort_values(by=[ 'body', 'make', 'model', 'trim',], inplace=True)
 nc = NanoCube(df, dimensions=['make', 'model', 'trim', 'body'], measures=['mmr'], caching=False, indexing_method='roaring')
 
@@ -1,13 +1,15 @@
 from nanocube import NanoCube
 import duckdb
 import pandas as pd
-from timeit import timeit
+from timeit import timeit, repeat
 from pathlib import Path
 import os
+import gc
 
 # Create a DataFrame and NanoCube
 file_car_prices = Path(os.path.dirname(os.path.realpath(__file__))) / "files" / "car_prices.parquet"
-df = pd.read_parquet(file_car_prices)
+columns = ['make', 'model', 'trim', 'body', 'mmr']  # only the columns used by the queries
+df = pd.read_parquet(file_car_prices, columns=columns)
 #df.sort_values(by=['body', 'make', 'model', 'trim'], inplace=True)
 nc = NanoCube(df, dimensions=['make', 'model', 'trim', 'body'], measures=['mmr'], caching=False)
 nc_cached = NanoCube(df, dimensions=['make', 'model', 'trim', 'body'], measures=['mmr'], caching=True)
@@ -27,10 +29,13 @@ def query_nanocube_cached(loops=1000):
 
 
 if __name__ == '__main__':
-    ncc_time = timeit(query_nanocube_cached, number=1)
-    nc_time = timeit(query_nanocube, number=1)
+    # the first query fills the cache, it is measured separately from the recurring (cached) queries
+    cold_time = timeit(lambda: query_nanocube_cached(loops=1), number=1)
+    gc.collect()
+    ncc_time = min(repeat(query_nanocube_cached, number=1, repeat=5))
+    nc_time = min(repeat(query_nanocube, number=1, repeat=5))
     print(f"NanoCube point query in {nc_time:.5f} sec.")
-    print(f"NanoCube(cached) point query in {ncc_time:.5f} sec.")
+    print(f"NanoCube(cached) point query in {ncc_time:.5f} sec., first (uncached) query in {cold_time:.5f} sec.")
     print(f"NanoCube cached is {nc_time/ncc_time:.2f}x times faster "
           f"vs. uncached on recurring queries with {1000/ncc_time:,.0f} q/sec.")
     print(f"\tns.get('mmr', model='Optima', trim='LX', make='Kia', body='Sedan')")
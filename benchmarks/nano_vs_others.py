@@ -1,9 +1,8 @@
-from timeit import timeit
+from timeit import repeat
 from pathlib import Path
 import os
 
 import pandas as pd
-from duckdb.duckdb import query
 
 from nanocube import NanoCube
 
@@ -122,11 +121,12 @@ if __name__ == '__main__':
     print ("Benchmarking NanoCube vs Others (please wait...)")
     print ("*"*50)
     print(f"\tDataset:     'car_prices_us.parquet' ({len(df.columns)} columns x {len(df):,} rows)")
-    print(f"\tIterations:  1,000x queries per technology")
+    print(f"\tIterations:  1,000x queries per technology, best of 3 runs")
     print(f"\tFiltering:   4x columns (model='Optima', trim='LX', make='Kia', body='Sedan')")
     print(f"\tAggregation: sum() over column 'mmr'")
 
-    results = {method: round(timeit(query, number=1), 3) for method, query in methods.items()}
+    # best of 3 runs, timeit disables the garbage collector while timing
+    results = {method: round(min(repeat(query, number=1, repeat=3)), 3) for method, query in methods.items()}
     min_result = min(results.values())
     results = dict(sorted(results.items(), key=lambda x: x[1]))
     data = {"technology": list(results.keys()), "duration_sec": list(results.values()),
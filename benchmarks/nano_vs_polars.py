@@ -9,7 +9,8 @@ import os
 
 # Create a DataFrame and NanoCube
 file_car_prices = Path(os.path.dirname(os.path.realpath(__file__))) / "files" / "car_prices.parquet"
-df = pd.read_parquet(file_car_prices)
+columns = ['make', 'model', 'trim', 'body', 'mmr']  # only the columns used by the queries
+df = pd.read_parquet(file_car_prices, columns=columns)
 #df.sort_values(by=['body', 'make', 'model', 'trim'], inplace=True)
 df.sort_values(by=['model', 'make', 'trim', 'body'], inplace=True)
 nc = NanoCube(df, dimensions=['make', 'model', 'trim', 'body'], measures=['mmr'], caching=False)
@@ -32,6 +33,25 @@ def query_polars(loops=1000):
         value += df.filter(pl.col('make') == 'Kia', pl.col('model') == 'Optima', pl.col('trim') == 'LX', pl.col('body') == 'Sedan')['mmr'].sum()
     return value
 
+def query_polars_lazy(loops=1000):
+    value = 0
+    for _ in range(loops):
+        value += (df.lazy()
+                  .filter(pl.col('make') == 'Kia', pl.col('model') == 'Optima', pl.col('trim') == 'LX', pl.col('body') == 'Sedan')
+                  .select(pl.col('mmr').sum()).collect().item())
+    return value
+
+def polars_group_by():
+    # all point queries at once, in one fused and parallel scan
+    result = df.lazy().group_by('make', 'model', 'trim', 'body').agg(pl.col('mmr').sum()).collect()
+    return {tuple(row[:4]): row[4] for row in result.iter_rows()}
+
+def query_polars_group_by(loops=1000, totals=None):
+    value = 0
+    for _ in range(loops):
+        value += totals[('Kia', 'Optima', 'LX', 'Sedan')]
+    return value
+
 
 if __name__ == '__main__':
 
@@ -42,4 +62,13 @@ if __name__ == '__main__':
     print(f"NanoCube {loops}x point queries in {nc_time:.5f} sec., {loops/nc_time:.0f} queries/sec.")
     print(f"NanoCube is {pl_time/nc_time:.2f}x times faster than Polars on query with 4 filters on 1 measure:")
     print(f"\tns.get('mmr', model='Optima', trim='LX', make='Kia', body='Sedan')")
+
+    lazy_time = timeit(query_polars_lazy, number=1)
+    print(f"Polars (lazy) {loops}x point queries in {lazy_time:.5f} sec, {loops/lazy_time:.0f} queries/sec.")
+    totals = {}
+    group_by_time = timeit(lambda: totals.update(polars_group_by()), number=1)
+    lookup_time = timeit(lambda: query_polars_group_by(totals=totals), number=1)
+    print(f"Polars (lazy) group_by over all {len(totals):,} member combinations in {group_by_time:.5f} sec., "
+          f"then {loops}x lookups in {lookup_time:.5f} sec.")
+    assert(query_polars_lazy(loops=1) == query_polars(loops=1) == query_polars_group_by(loops=1, totals=totals))
     assert(query_nanocube() == query_polars())
@@ -0,0 +1,118 @@
+# nanocube - Copyright (c)2024, Thomas Zeutschler, MIT license
+import numpy as np
+
+# The kernels reduce the values of the given rows in one pass, without materializing the gathered values
+# in a temporary array first. They expect a non-empty rows array and values without NaNs. The accumulator
+# has the dtype of the values. Floats are only reduced by min and max: a running float total differs in
+# the last digits from numpy's pairwise summation, and results must not depend on numba being installed.
+_KERNEL_FUNCTIONS = {
+    np.dtype(np.int64): ("sum", "min", "max"),
+    np.dtype(np.float64): ("min", "max"),
+}
+
+
+def _gather_sum(values, rows):
+    total = values[rows[0]]
+    for i in range(1, rows.size):
+        total += values[rows[i]]
+    return total
+
+
+def _gather_min(values, rows):
+    result = values[rows[0]]
+    for i in range(1, rows.size):
+        value = values[rows[i]]
+        if value < result:
+            result = value
+    return result
+
+
+def _gather_max(values, rows):
+    result = values[rows[0]]
+    for i in range(1, rows.size):
+        value = values[rows[i]]
+        if value > result:
+            result = value
+    return result
+
+
+# The matrix kernels aggregate multiple measures, rows of a 2d values matrix, in one pass over the rows.
+# Each row id is visited once and all accumulators are updated, instead of one gather per measure.
+# They support the same aggregation functions and dtypes as the kernels above, see _KERNEL_FUNCTIONS.
+
+def _gather_sum_matrix(matrix, measures, rows):
+    result = np.empty(measures.size, dtype=matrix.dtype)
+    for m in range(measures.size):
+        result[m] = matrix[measures[m], rows[0]]
+    for i in range(1, rows.size):
+        row = rows[i]
+        for m in range(measures.size):
+            result[m] += matrix[measures[m], row]
+    return result
+
+
+def _gather_min_matrix(matrix, measures, rows):
+    result = np.empty(measures.size, dtype=matrix.dtype)
+    for m in range(measures.size):
+        result[m] = matrix[measures[m], rows[0]]
+    for i in range(1, rows.size):
+        row = rows[i]
+        for m in range(measures.size):
+            value = matrix[measures[m], row]
+            if value < result[m]:
+                result[m] = value
+    return result
+
+
+def _gather_max_matrix(matrix, measures, rows):
+    result = np.empty(measures.size, dtype=matrix.dtype)
+    for m in range(measures.size):
+        result[m] = matrix[measures[m], rows[0]]
+    for i in range(1, rows.size):
+        row = rows[i]
+        for m in range(measures.size):
+            value = matrix[measures[m], row]
+            if value > result[m]:
+                result[m] = value
+    return result
+
+
+_KERNELS: dict | None = None  # aggregation function -> kernel, None until first requested
+_MATRIX_KERNELS: dict | None = None
+
+
+def _compile(functions: dict) -> dict:
+    """
+    Returns the given functions as numba kernels, or an empty dict if numba is not installed. numba is
+    imported on first use only, and the kernels are compiled per dtype on their first call.
+    """
+    try:
+        from numba import njit  # optional, install nanocube[fast]
+    except ImportError:
+        return {}
+    jit = njit(nogil=True, cache=True)
+    return {name: jit(function) for name, function in functions.items()}
+
+
+def gather_kernels(dtype) -> dict:
+    """
+    Returns the gather-and-reduce kernels, as a dict of aggregation function -> kernel, applicable
+    to values of the given dtype. The dict is empty if numba is not installed or the dtype is not
+    supported. Call it on the first query, the kernels are compiled on their first call.
+    """
+    global _KERNELS
+    if _KERNELS is None:
+        _KERNELS = _compile({"sum": _gather_sum, "min": _gather_min, "max": _gather_max})
+    return {f: _KERNELS[f] for f in _KERNEL_FUNCTIONS.get(dtype, ()) if f in _KERNELS}
+
+
+def gather_matrix_kernels(dtype) -> dict:
+    """
+    Returns the matrix kernels, as a dict of aggregation function -> kernel, applicable to a values
+    matrix of the given dtype. The kernels take the matrix, the measures (rows of the matrix) and
+    the row ids as intp arrays and return an array with one value per measure.
+    """
+    global _MATRIX_KERNELS
+    if _MATRIX_KERNELS is None:
+        _MATRIX_KERNELS = _compile({"sum": _gather_sum_matrix, "min": _gather_min_matrix, "max": _gather_max_matrix})
+    return {f: _MATRIX_KERNELS[f] for f in _KERNEL_FUNCTIONS.get(dtype, ()) if f in _MATRIX_KERNELS}
@@ -1,12 +1,14 @@
 # nanocube - Copyright (c)2024, Thomas Zeutschler, MIT license
 import json
-from array import array
+import os
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
 from pandas.api.types import is_numeric_dtype, is_bool_dtype, is_float_dtype
 from pyroaring import BitMap
 
 from nanocube.schema import Schema
+from nanocube._kernels import gather_kernels, gather_matrix_kernels
 from nanocube.nano_index import NanoIndex, NanoRoaringIndex, NanoNumpyIndex, IndexingMethod
 import lz4.frame
 import zstandard as zstd
@@ -15,6 +17,53 @@ import zstandard as zstd
 import pyarrow as pa
 import pyarrow.parquet as pq
 
+try:
+    import orjson  # optional, a much faster JSON codec for the metadata of saved cubes
+except ImportError:
+    orjson = None
+
+
+_DATA_COLUMN = "__nanocube__"  # the binary column holding the metadata and the serialized bitmaps of saved cubes
+_DICTIONARY_LIMIT = 1 << 16  # measures of saved cubes with more distinct values are not dictionary encoded
+_FILE_VERSION = "0.2.0"  # the file format written by save(), files of other versions are rejected by load()
+
+
+def _json_dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj).encode('utf-8')
+
+
+def _json_loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _count_nonzero(values, axis=None):
+    """Like `np.count_nonzero`, but always returns a numpy value, also when no axis is given."""
+    return np.asarray(np.count_nonzero(values, axis=axis))
+
+
+def _count_rows(values, rows) -> int:
+    """The count of a measure without zeros, no need to gather the values of the rows."""
+    return len(rows)
+
+
+def _is_measure_dtype(dtype) -> bool:
+    """Numeric, but not boolean. Decided on the dtype kind, pandas is only asked for object-like dtypes."""
+    kind = dtype.kind
+    if kind == "O":
+        return is_numeric_dtype(dtype) and not is_bool_dtype(dtype)
+    return kind in ("i", "u", "f", "c")
+
+
+def _is_float_dtype(dtype) -> bool:
+    kind = dtype.kind
+    if kind == "O":
+        return is_float_dtype(dtype)
+    return kind == "f"
+
 
 class NanoCube:
     def __init__(self, df: pd.DataFrame, dimensions: list | None = None, measures:list | None = None,
@@ -61,18 +110,39 @@ class NanoCube:
             "max": np.nanmax,
             "std": np.nanstd,
             "var": np.nanvar,
-            "count": np.count_nonzero,
+            "count": _count_nonzero,
+        }
+        # the same aggregations without the NaN handling, for measures that contain no NaNs
+        self._agg_func_plain: dict = {
+            "sum": np.sum,
+            "mean": np.mean,
+            "min": np.min,
+            "max": np.max,
+            "std": np.std,
+            "var": np.var,
+            "count": _count_nonzero,
         }
 
-        measures = [c for c in df.columns if is_numeric_dtype(df[c].dtype) and not is_bool_dtype(df[c].dtype)] if measures is None else measures
+        # column types are inferred from the dtype metadata only, the data itself is never touched
+        dtypes = df.dtypes if measures is None or dimensions is None else None
+        measures = [c for c, t in dtypes.items() if _is_measure_dtype(t)] if measures is None else measures
         self.measures:dict = dict([(col, i) for i, col in enumerate(measures)])
 
-        dimensions = [c for c in df.columns if not c in measures and not is_float_dtype(df[c].dtype)] if dimensions is None else dimensions
+        if dimensions is None:
+            measure_set = set(measures)
+            dimensions = [c for c, t in dtypes.items() if c not in measure_set and not _is_float_dtype(t)]
         self.indexing_method: IndexingMethod = IndexingMethod.from_str(indexing_method)
         self.index:NanoIndex = NanoIndex.create(df=df, dimensions=dimensions, indexing_method=self.indexing_method)
         self.dimensions:dict = self.index._dimensions
 
-        self.values: list = [df[c].to_numpy() for c in self.measures.keys()]  # value vectors (references only)
+        self.values: list = []  # value vectors, one per measure
+        self._value_matrix: np.ndarray | None = None  # all value vectors as one 2d array, if equally typed
+        self._totals: dict = {}  # aggregation function -> aggregated values over all rows, per measure
+        self._has_nan: list = []  # per measure, True if the value vector contains NaNs
+        self._agg_by_measure: list = []  # per measure, the aggregation functions, NaN handling only if needed
+        self._kernels: list = []  # per measure, the gather-and-reduce kernels applicable to it, None until queried
+        self._matrix_kernels: dict | None = None  # the kernels applicable to the value matrix, None until queried
+        self._set_values([df[c].to_numpy() for c in self.measures.keys()])
         self.caching:bool = caching
         self.cache: dict = {"@":0} if caching else None
 
@@ -82,7 +152,7 @@ class NanoCube:
             self._decompress = lz4.frame.decompress
         elif compressor == "zstd":
             self._compress = zstd.ZstdCompressor(level=3).compress
-            self._decompress = zstd.ZstdDecompressor().decompress
+            self._decompress = zstd.decompress  # a new context per call, decompressor objects are not thread-safe
 
 
     def get(self, *args, aggregate: str | None = "sum",  **kwargs):
@@ -91,6 +161,7 @@ class NanoCube:
 
         :param aggregate: the aggregation function to be used (sum, mean, min, max, std, var, count).
         :param kwargs: the dimension column names as keyword and their requested members as argument.
+            Missing values (None, NaN, NA) in a dimension column are addressed as member None.
         :param args: (optional) some measure column names to be returned.
         :return:
             The aggregated values as:
@@ -100,45 +171,167 @@ class NanoCube:
         """
 
         if self.caching:
-            key = f"{args}-{kwargs}"
+            key = (args, aggregate, tuple(sorted((d, tuple(m) if isinstance(m, list) else m) for d, m in kwargs.items())))
             if key in self.cache:
                 return self.cache[key]
 
         rows = self.index.get_rows(**kwargs)
-        agg_func = self._agg_func[aggregate]  # if aggregate in self._agg_func else np.nansum
-
-        if isinstance(rows, array | np.ndarray) and len(rows) > 0:
-            if len(args) == 0:  # return all measures as dict
-                result = dict([(c, agg_func(self.values[i][rows]).item()) for c, i in self.measures.items()])
-            elif len(args) == 1:  # return one measure as scalar value
-                result = agg_func(self.values[self.measures[args[0]]][rows]).item()
-            else:  # return list of measures
-                result = [agg_func(self.values[self.measures[a]][rows]) for a in args]
-        elif not rows:  # no rows available for the given context
-            result = 0
-        else: # rows == True -> return all rows
+
+        if rows is None:  # all rows, the totals are aggregated only once per aggregation function
+            totals = self._totals.get(aggregate)
+            if totals is None:
+                totals = self._totals[aggregate] = [agg[aggregate](v).item()
+                                                    for agg, v in zip(self._agg_by_measure, self.values)]
             if len(args) == 0:
-                result = dict([(c, agg_func(self.values[i]).item()) for c, i in self.measures.items()])
+                result = dict([(c, totals[i]) for c, i in self.measures.items()])
             elif len(args) == 1:
-                result = agg_func(self.values[self.measures[args[0]]]).item()
+                result = totals[self.measures[args[0]]]
             else:
-                result = [agg_func(self.values[self.measures[a]]).item() for a in args]
+                result = [totals[self.measures[a]] for a in args]
+        elif len(rows) == 0:  # no rows available for the given context
+            result = 0
+        elif len(args) == 0:  # return all measures as dict
+            result = dict([(c, self._gather_reduce(i, rows, aggregate)) for c, i in self.measures.items()])
+        elif len(args) == 1:  # return one measure as scalar value
+            result = self._gather_reduce(self.measures[args[0]], rows, aggregate)
+        elif self._value_matrix is not None:  # return list of measures, gathered in one pass
+            idxs = [self.measures[a] for a in args]
+            has_nan = any(self._has_nan[i] for i in idxs)
+            if self._matrix_kernels is None:
+                self._matrix_kernels = gather_matrix_kernels(self._value_matrix.dtype)
+            kernel = None if has_nan else self._matrix_kernels.get(aggregate)
+            if kernel is not None:  # visits each row once, for all measures
+                result = kernel(self._value_matrix, np.array(idxs, dtype=np.intp), rows).tolist()
+            else:
+                func = (self._agg_func if has_nan else self._agg_func_plain)[aggregate]
+                result = func(self._value_matrix[np.ix_(idxs, rows)], axis=1).tolist()
+        else:  # return list of measures
+            result = [self._gather_reduce(self.measures[a], rows, aggregate) for a in args]
 
         if self.caching:
             self.cache[key] = result
         return result
 
+    def _gather_reduce(self, i: int, rows: np.ndarray, aggregate: str):
+        """Aggregates the values of measure `i` for the given (non-empty) rows."""
+        kernel = self._kernels_of(i).get(aggregate)
+        if kernel is not None:  # reduces while gathering, without a temporary array of the gathered values
+            return kernel(self.values[i], rows)
+        return self._agg_by_measure[i][aggregate](self.values[i][rows]).item()
+
+    def _kernels_of(self, i: int) -> dict:
+        """Returns the kernels applicable to measure `i`, resolved on its first query, not on construction."""
+        kernels = self._kernels[i]
+        if kernels is None:
+            values = self.values[i]
+            kernels = {} if self._has_nan[i] else gather_kernels(values.dtype)
+            if not np.any(values == 0):  # all values count, the count is the number of rows
+                kernels["count"] = _count_rows
+            self._kernels[i] = kernels
+        return kernels
+
+    def compile(self, measures: str | list | tuple, dimensions: str | list | tuple, aggregate: str = "sum"):
+        """
+        Create a query function specialized for a fixed set of measures and dimensions. The function takes
+        one member per dimension as positional arguments, in the order of the given dimensions, and returns
+        the same result as `get(*measures, aggregate=aggregate, **dict(zip(dimensions, members)))`.
+        Lookups of measures, dimensions and the aggregation function are resolved once, and results
+        are not cached. Lists of members are not supported, use `get` instead.
+
+        :param measures: the measure column name, or a list of measure column names, to be returned.
+        :param dimensions: the dimension column name, or a list of dimension column names, to be filtered.
+        :param aggregate: the aggregation function to be used (sum, mean, min, max, std, var, count).
+        :return:
+            A function returning the aggregated values as a scalar for one measure,
+            or as a list of values for multiple measures.
+
+        Examples
+        --------
+        >>> query = cube.compile('sales', ['customer', 'product'])
+        >>> query('A', 'P1')
+        100
+        """
+        measures = [measures] if isinstance(measures, str) else list(measures)
+        dimensions = [dimensions] if isinstance(dimensions, str) else list(dimensions)
+        if not measures:
+            raise ValueError("At least one measure is required.")
+        idxs = [self.measures[m] for m in measures]
+        bitmaps = [self.index._bitmaps[self.dimensions[d]] for d in dimensions]
+        intersect = self.index._intersect
+        agg_func = (self._agg_func if any(self._has_nan[i] for i in idxs) else self._agg_func_plain)[aggregate]
+
+        def rows_of(members):
+            if len(members) != len(bitmaps):
+                raise TypeError(f"Expected {len(bitmaps)} members, got {len(members)}.")
+            if not bitmaps:
+                return slice(None)
+            rows = intersect([b[m] for b, m in zip(bitmaps, members)])
+            return rows if len(rows) > 0 else None
+
+        if len(idxs) == 1:
+            values = self.values[idxs[0]]
+            kernel = self._kernels_of(idxs[0]).get(aggregate) if bitmaps else None
+            reduce = (lambda rows: kernel(values, rows)) if kernel else (lambda rows: agg_func(values[rows]).item())
+        elif self._value_matrix is not None:
+            # the measures are already packed into one matrix, their rows are gathered in a single pass, as by get()
+            matrix, packed = self._value_matrix, np.array(idxs, dtype=np.intp)
+            if self._matrix_kernels is None:
+                self._matrix_kernels = gather_matrix_kernels(matrix.dtype)
+            has_nan = any(self._has_nan[i] for i in idxs)
+            kernel = self._matrix_kernels.get(aggregate) if bitmaps and not has_nan else None
+            if kernel is not None:
+                reduce = lambda rows: kernel(matrix, packed, rows).tolist()
+            else:
+                def reduce(rows):
+                    gathered = matrix[packed] if isinstance(rows, slice) else matrix[np.ix_(packed, rows)]
+                    return agg_func(gathered, axis=1).tolist()
+        else:
+            # differently typed measures are aggregated one by one, each in its own dtype
+            gather_reduce, values, agg_by_measure = self._gather_reduce, self.values, self._agg_by_measure
+            if bitmaps:
+                reduce = lambda rows: [gather_reduce(i, rows, aggregate) for i in idxs]
+            else:
+                reduce = lambda rows: [agg_by_measure[i][aggregate](values[i]).item() for i in idxs]
+
+        def query(*members):
+            rows = rows_of(members)
+            return 0 if rows is None else reduce(rows)
+
+        return query
+
+    def _set_values(self, values: list):
+        """
+        Stores the value vectors of the measures. Equally typed measures are packed into
+        one contiguous 2d array, so queries on multiple measures gather their rows in a single pass.
+        """
+        self._totals = {}
+        self._has_nan = [v.dtype.kind in ("f", "c") and bool(np.isnan(v).any()) for v in values]
+        self._agg_by_measure = [self._agg_func if h else self._agg_func_plain for h in self._has_nan]
+        self._kernels = [None] * len(values)
+        self._matrix_kernels = None
+        if len(values) > 1 and all(v.dtype == values[0].dtype for v in values):
+            self._value_matrix = np.stack(values)
+            self.values = list(self._value_matrix)
+        else:
+            self._value_matrix = None
+            self.values = [np.ascontiguousarray(v) for v in values]
+
     @staticmethod
     def load(file_name: str) -> 'NanoCube':
         """
         Load a NanoCube from a file.
         """
-        # Read from Parquet
-        table = pq.read_table(file_name)
+        # Read from Parquet, the blobs are accessed as Arrow buffers instead of being copied into Python bytes
+        table = pq.read_table(file_name, memory_map=True)
+        version = (table.schema.metadata or {}).get(b"version", b"").decode()
+        if version != _FILE_VERSION or _DATA_COLUMN not in table.column_names:
+            raise ValueError(f"Unsupported NanoCube file format version '{version}' of file '{file_name}', "
+                             f"expected version '{_FILE_VERSION}'. Files of older versions can not be loaded, "
+                             f"create the NanoCube from its DataFrame and save it again.")
+        column = table.column(_DATA_COLUMN)
 
         # Deserialize metadata
-        bin_data = table[0].to_pylist()
-        meta = json.loads(bin_data[0])
+        meta = _json_loads(column[0].as_py())
 
         method = meta["indexing_method"]
         indexing_method = IndexingMethod.from_str(method)
@@ -147,33 +340,31 @@ class NanoCube:
         nc.index._dimensions = meta["dimensions"]
         nc.dimensions = meta["dimensions"]
         nc.measures = meta["measures"]
-        nc.values = meta["values"]
-        value_types = meta["value_types"]
-        nc.index._bitmaps = [dict([(m, i) for m, i in bm.items()]) for bm in meta["members"]]
-
-        # Deserialize bitmaps
-        if indexing_method == IndexingMethod.roaring:
-            for d, bm_dict in enumerate(nc.index._bitmaps):
-                for m, i in bm_dict.items():
-                    nc.index._bitmaps[d][m] = BitMap.deserialize(nc._decompress(bin_data[i]))
-        elif indexing_method == IndexingMethod.numpy:
-            for d, bm_dict in enumerate(nc.index._bitmaps):
-                for m, i in bm_dict.items():
-                    data = BitMap.deserialize(nc._decompress(bin_data[i])).to_array()
-                    nc.index._bitmaps[d][m] = np.array(data)
-        else:
+
+        # Deserialize bitmaps, the bitmaps (or row ids) of all members of a dimension are stored in one compressed blob
+        if indexing_method not in (IndexingMethod.roaring, IndexingMethod.numpy):
             raise ValueError(f"Unsupported indexing method {indexing_method}")
+        def load_dimension(members: list, offsets: list, i: int) -> dict:
+            data = nc._decompress(column[i].as_buffer())
+            if indexing_method == IndexingMethod.roaring:
+                data = memoryview(data)
+                bitmaps = [BitMap.deserialize(data[offsets[j]:offsets[j + 1]]) for j in range(len(members))]
+            else:  # the row ids of all members, the members are views on it
+                data = np.frombuffer(data, dtype=np.uint32)
+                bitmaps = [data[offsets[j]:offsets[j + 1]] for j in range(len(members))]
+            return dict(zip(members, bitmaps))
+
+        # the dimensions are decompressed in parallel, decompression releases the GIL
+        workers = min(len(meta["bitmaps"]), os.cpu_count() or 1)
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                nc.index._bitmaps = list(executor.map(load_dimension, meta["members"], meta["offsets"], meta["bitmaps"]))
+        else:
+            nc.index._bitmaps = list(map(load_dimension, meta["members"], meta["offsets"], meta["bitmaps"]))
 
-        # Deserialize values
-        for i, v in enumerate(nc.values):
-            value_type = value_types[i]
-            if value_type == 'float64':
-                type = np.float64
-            elif value_type == 'int64':
-                type = np.int64
-            else:
-                raise ValueError(f"Unsupported value type {value_type}")
-            nc.values[i] = np.frombuffer(nc._decompress(bin_data[v]), dtype=type)
+        # Deserialize values, the measures are stored as typed columns
+        measures = sorted(nc.measures, key=nc.measures.get)
+        nc._set_values([table.column(m).slice(0, meta["rows"]).to_numpy() for m in measures])
 
         return nc
 
@@ -182,45 +373,55 @@ class NanoCube:
         """
         Save the NanoCube to a file.
         """
-        # Create Arrow schema
-        schema = pa.schema([
-            pa.field('data', pa.binary())],
-            metadata={"app": "NanoCube", "version": "0.1.2"})
-
-        # Serialize metadata
+        # Serialize metadata, members are stored as lists to preserve their types (JSON keys are always strings)
         meta = {"rows": len(self.values[0]), "dimensions": self.dimensions, "measures": self.measures,
-                "members": [dict([(m, -1) for m in bm.keys()]) for bm in self.index._bitmaps],
-                "values": [-1 for _ in self.values],
-                "value_types": [f"{type(v[0]).__name__}" for v in self.values],
+                "members": [list(bm.keys()) for bm in self.index._bitmaps],
+                "offsets": [], "bitmaps": [],
                 "indexing_method": str(self.indexing_method)}
         bin_data = [None, ]
-        z = 1
-
-        # Serialize bitmaps
-        if self.indexing_method == IndexingMethod.roaring:
-            for i, bm_dict in enumerate(self.index._bitmaps):
-                for j, bm in enumerate(bm_dict.values()):
-                    bin_data.append(self._compress(bm.serialize()))
-                meta["members"][i].update({m: z + j for j, m in enumerate(bm_dict.keys())})
-                z += len(bm_dict)
-        elif self.indexing_method == IndexingMethod.numpy:
-            for i, bm_dict in enumerate(self.index._bitmaps):
-                for j, bm in enumerate(bm_dict.values()):
-                    bin_data.append(self._compress(BitMap(bm).serialize()))
-                meta["members"][i].update({m: z + j for j, m in enumerate(bm_dict.keys())})
-                z += len(bm_dict)
-        else:
-            raise ValueError(f"Unsupported indexing method {self.indexing_method}")
 
-        # Serialize values
-        for i, v in enumerate(self.values):
-            bin_data.append(self._compress(v.tobytes()))
-            meta["values"][i] = z + i
+        # Serialize bitmaps, all bitmaps of a dimension are concatenated and compressed in one go. The row ids
+        # of the numpy index are stored as they are, as one uint32 array per dimension.
+        if self.indexing_method not in (IndexingMethod.roaring, IndexingMethod.numpy):
+            raise ValueError(f"Unsupported indexing method {self.indexing_method}")
+        for bm_dict in self.index._bitmaps:
+            if self.indexing_method == IndexingMethod.roaring:
+                blobs = [bm.serialize() for bm in bm_dict.values()]
+                sizes = [len(b) for b in blobs]
+                data = b"".join(blobs)
+            else:
+                blobs = [np.asarray(bm, dtype=np.uint32) for bm in bm_dict.values()]
+                sizes = [len(b) for b in blobs]
+                data = np.concatenate(blobs).tobytes() if blobs else b""
+            offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+            np.cumsum(sizes, out=offsets[1:])
+            meta["offsets"].append(offsets.tolist())
+            meta["bitmaps"].append(len(bin_data))
+            bin_data.append(self._compress(data))
 
         # Serialize metadata
-        bin_data[0] = json.dumps(meta).encode('utf-8')
+        bin_data[0] = _json_dumps(meta)
+
+        # Serialize values as typed columns next to the blobs, Parquet requires all columns to be of equal length,
+        # so the shorter side is padded with nulls. The measures are written without copying their numpy buffers.
+        size = max(len(bin_data), meta["rows"])
+        names = [_DATA_COLUMN] + sorted(self.measures, key=self.measures.get)
+        # the blobs use 64-bit offsets, the blob of a single dimension of a large cube can exceed 2 GB
+        arrays = [pa.array(bin_data, type=pa.large_binary())] + [pa.array(v) for v in self.values]
+        arrays = [a if len(a) == size else pa.concat_arrays([a, pa.nulls(size - len(a), a.type)]) for a in arrays]
 
         # write to disk
-        data = [pa.array(bin_data, type=pa.binary()), ]
-        pat = pa.Table.from_arrays(data, schema=schema)
-        pq.write_table(pat, file_name)
+        schema = pa.schema([pa.field(n, a.type) for n, a in zip(names, arrays)],
+                           metadata={"app": "NanoCube", "version": _FILE_VERSION})
+        pat = pa.Table.from_arrays(arrays, schema=schema)
+        # Measures with few distinct values are dictionary encoded by Parquet. For all others, integers are delta
+        # encoded and the bytes of floats are split into streams, both compress much better than plain values.
+        # The blobs are compressed already, so they are neither dictionary encoded nor compressed again.
+        encodings = {}
+        for name, v in zip(names[1:], self.values):
+            if v.dtype.kind in ("i", "u", "f") and len(pd.unique(v)) > _DICTIONARY_LIMIT:
+                encodings[name] = "BYTE_STREAM_SPLIT" if v.dtype.kind == "f" else "DELTA_BINARY_PACKED"
+        pq.write_table(pat, file_name,
+                       compression={n: "none" if n == _DATA_COLUMN else "zstd" for n in names},
+                       use_dictionary=[n for n in names[1:] if n not in encodings],
+                       column_encoding=encodings or None)
@@ -17,7 +17,10 @@ class IndexingMethod(Enum):
     @staticmethod
     def from_str(label):
         if isinstance(label, str):
-            return IndexingMethod.numpy if label.lower().strip() == "numpy" else IndexingMethod.roaring
+            method = _INDEXING_METHODS.get(label)
+            if method is None:
+                method = _INDEXING_METHODS.get(label.lower().strip(), IndexingMethod.roaring)
+            return method
         return label
 
     def __str__(self):
@@ -28,9 +31,34 @@ class IndexingMethod(Enum):
             return self.value == other
         return self.value == other.value
 
+
+_INDEXING_METHODS: dict = {method.value: method for method in IndexingMethod}
+_NO_ROWS = np.empty(0, dtype=np.intp)
+_NO_ROWS.flags.writeable = False
+
+def _member_rows(values: pd.Series) -> tuple[list, np.ndarray, list]:
+    """Groups the row ids of a column by member. Returns the distinct members, the row ids
+    ordered by member (ascending within a member) and the offsets of each member in that order.
+    Missing values (None, NaN, NA, NaT) are collapsed into one member, which is always None."""
+    codes, uniques = pd.factorize(values, sort=False, use_na_sentinel=False)
+    order = np.argsort(codes, kind="stable").astype(np.uint32)
+    offsets = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(uniques))))).tolist()
+    members = uniques.tolist()
+    for i in np.flatnonzero(pd.isna(uniques)):
+        members[i] = None
+    return members, order, offsets
+
+
 class NanoIndex:
     @abstractmethod
-    def get_rows(self, **kwargs) -> array | bool:
+    def get_rows(self, **kwargs) -> np.ndarray | None:
+        """Returns the row ids matching the given members as an intp array,
+        which is empty if no rows match, or None if all rows match (no filters given)."""
+        pass
+
+    @abstractmethod
+    def _intersect(self, bitmaps: list) -> np.ndarray:
+        """Returns the row ids contained in all of the given bitmaps as an intp array."""
         pass
 
     @property
@@ -56,38 +84,44 @@ class NanoRoaringIndex(NanoIndex):
         self._dimensions: dict = dict([(col, i) for i, col in enumerate(dimensions)])
         self._bitmaps: list = []  # bitmaps per dimension per member containing the row ids of the DataFrame
         for dimension in self.dimensions.keys():
-            member_bitmaps = {}
-            for row, member in enumerate(df[dimension].to_list()):
-                if member not in member_bitmaps:
-                    member_bitmaps[member] = BitMap([row])
-                else:
-                    member_bitmaps[member].add(row)
-            self._bitmaps.append(member_bitmaps)
+            members, order, offsets = _member_rows(df[dimension])
+            rows = array("I", order.tobytes())  # pyroaring bulk-loads typed uint32 arrays without per-item calls
+            self._bitmaps.append({member: BitMap(rows[offsets[i]:offsets[i + 1]]) for i, member in enumerate(members)})
 
     @property
     def dimensions(self) -> dict:
         return self._dimensions
 
-    def get_rows(self, **kwargs) -> array | bool:
+    def get_rows(self, **kwargs) -> np.ndarray | None:
         if kwargs:
-            bitmaps = [(reduce(lambda x, y: x | y, [self._bitmaps[d][m] for m in kwargs[dim]])
-                        if (isinstance(kwargs[dim], list) or isinstance(kwargs[dim], tuple)) and not isinstance(
-                kwargs[dim], str)
-                        else self._bitmaps[d][kwargs[dim]]) for d, dim in enumerate(self.dimensions.keys()) if
-                       dim in kwargs]
+            bitmaps = []
+            for dim, members in kwargs.items():
+                d = self._dimensions.get(dim)
+                if d is None:
+                    continue
+                if isinstance(members, list | tuple):
+                    # a single n-ary union, instead of n-1 intermediate bitmaps
+                    bitmaps.append(BitMap.union(*[self._bitmaps[d][m] for m in members]))
+                else:
+                    bitmaps.append(self._bitmaps[d][members])
             if bitmaps:
-                bitmaps = sorted(bitmaps, key=lambda l: len(l))
-
-                bitmap = bitmaps[0].copy()
-                for i in range(1, len(bitmaps)):
-                    bitmap &= bitmaps[i]
-                return bitmap.to_array()
-
-                return reduce(lambda x, y: x & y, bitmaps).to_array() if bitmaps else False
+                return self._intersect(bitmaps)
             else:
-                return False
+                return _NO_ROWS
         else:
-            return True
+            return None
+
+    def _intersect(self, bitmaps: list) -> array:
+        # intersect smallest first, the result can only shrink and is mostly empty early on
+        bitmaps.sort(key=len)
+        bitmap = bitmaps[0]
+        if len(bitmaps) > 1:
+            bitmap = bitmap.copy()
+            for other in bitmaps[1:]:
+                bitmap &= other
+                if not bitmap:
+                    break
+        return np.asarray(bitmap.to_array(), dtype=np.intp)
 
 
 class NanoNumpyIndex(NanoIndex):
@@ -97,33 +131,35 @@ class NanoNumpyIndex(NanoIndex):
         self._dimensions: dict = dict([(col, i) for i, col in enumerate(dimensions)])
         self._bitmaps: list = []  # bitmaps per dimension per member containing the row ids of the DataFrame
         for col in self.dimensions.keys():
-            member_bitmaps = {}
-            for row, member in enumerate(df[col].to_list()):
-                if member not in member_bitmaps:
-                    member_bitmaps[member] = BitMap([row])
-                else:
-                    member_bitmaps[member].add(row)
-
-            for v in member_bitmaps.keys():
-                member_bitmaps[v] = np.array(member_bitmaps[v].to_array())
-            self._bitmaps.append(member_bitmaps)
+            members, order, offsets = _member_rows(df[col])
+            self._bitmaps.append({member: order[offsets[i]:offsets[i + 1]] for i, member in enumerate(members)})
 
     @property
     def dimensions(self) -> dict:
         return self._dimensions
 
-    def get_rows(self, **kwargs) -> array | bool:
+    def get_rows(self, **kwargs) -> np.ndarray | None:
         if kwargs:
-            bitmaps = [(reduce(lambda x, y: snp.merge(x, y, duplicates=snp.MergeDuplicates.DROP), [self._bitmaps[d][m] for m in kwargs[dim]])
-                        if isinstance(kwargs[dim], list | tuple) and not isinstance(kwargs[dim], str)
-                        else self._bitmaps[d][kwargs[dim]]) for d, dim in enumerate(self.dimensions.keys()) if dim in kwargs]
+            bitmaps = []
+            for dim, members in kwargs.items():
+                d = self._dimensions.get(dim)
+                if d is None:
+                    continue
+                if isinstance(members, list | tuple):
+                    bitmaps.append(reduce(lambda x, y: snp.merge(x, y, duplicates=snp.MergeDuplicates.DROP),
+                                          [self._bitmaps[d][m] for m in members]))
+                else:
+                    bitmaps.append(self._bitmaps[d][members])
 
             if bitmaps:
-                bitmaps = sorted(bitmaps, key=lambda l: len(l))
-                return reduce(lambda x, y: snp.intersect(x, y, duplicates=snp.IntersectDuplicates.DROP),
-                              bitmaps) if bitmaps else False
+                return self._intersect(bitmaps)
                 # return snp.kway_intersect(bitmaps, assume_sorted=True) if bitmaps else False
             else:
-                return False
+                return _NO_ROWS
         else:
-            return True
+            return None
+
+    def _intersect(self, bitmaps: list) -> np.ndarray:
+        bitmaps = sorted(bitmaps, key=lambda l: len(l))
+        rows = reduce(lambda x, y: snp.intersect(x, y, duplicates=snp.IntersectDuplicates.DROP), bitmaps)
+        return rows.astype(np.intp)
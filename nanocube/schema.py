@@ -5,7 +5,7 @@ from typing import Any
 import numpy as np
 
 
-@dataclass
+@dataclass(slots=True)
 class SchemaDimension:
     """Defines a Dimension of a NanoCube."""
     ordinal: int
@@ -14,7 +14,7 @@ class SchemaDimension:
     description: str = None
 
 
-@dataclass
+@dataclass(slots=True)
 class SchemaMeasure:
     """Defines a Measure of a NanoCube."""
     ordinal: int
@@ -36,36 +36,21 @@ class Schema:
         self._load_dimensions(df, dimensions)
 
     def _load_dimensions(self, df, dimensions):
-
-        if isinstance(dimensions, str):
-            dimensions = SchemaDimension(ordinal=0, column=dimensions)
-        if isinstance(dimensions, SchemaDimension):
-            self.dimensions.append(dimensions)
-            return
-        if not isinstance(dimensions, list | tuple):
-            raise ValueError("Argument `dimensions` must be list or tuple of type "
-                             "`SchemaDimension` or `str` representing a columns name.")
-
-        for i, dimension in enumerate(dimensions):
-            if isinstance(dimension, str):
-                self.dimensions.append(SchemaDimension(ordinal=i, column=dimension))
-            else:
-                self.dimensions.append(dimension)
+        self.dimensions.extend(self._load_items(dimensions, SchemaDimension, "dimensions"))
 
     def _load_measures(self, df, measures):
         if measures is None:
             return
-        if isinstance(measures, str):
-            measures = SchemaMeasure(ordinal=0, column=measures)
-        if isinstance(measures, SchemaMeasure):
-            self.measures.append(measures)
-            return
-        if not isinstance(measures, list | tuple):
-            raise ValueError("Argument `measures` must be list or tuple of type "
-                             "`SchemaMeasure` or `str` representing a columns name.")
-
-        for i, measure in enumerate(measures):
-            if isinstance(measure, str):
-                self.measures.append(SchemaDimension(ordinal=i, column=measure))
-            else:
-                self.measures.append(measure)
+        self.measures.extend(self._load_items(measures, SchemaMeasure, "measures"))
+
+    @staticmethod
+    def _load_items(items, item_type: type, argument: str) -> list:
+        """Normalizes a single item or a list or tuple of items, given as column names or
+        `item_type` instances, into a list of `item_type` instances."""
+        if isinstance(items, (str, item_type)):
+            items = (items,)
+        elif not isinstance(items, (list, tuple)):
+            raise ValueError(f"Argument `{argument}` must be list or tuple of type "
+                             f"`{item_type.__name__}` or `str` representing a columns name.")
+        return [item_type(ordinal=i, column=item) if isinstance(item, str) else item
+                for i, item in enumerate(items)]
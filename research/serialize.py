@@ -1,6 +1,6 @@
 # Some Research on How to Serialize NanoCubes
-import random
 from datetime import datetime
+import numpy as np
 import pandas as pd
 from string import ascii_uppercase
 from nanocube import NanoCube
@@ -11,8 +11,12 @@ def create_df(dim_cols, msr_cols, rows, sorted: bool=True):
     def mn(n):
         d, m = divmod(n, 26)
         return '' if n < 0 else mn(d - 1) + chr(m + 65)
-    df_dim = pd.DataFrame([[mn(random.randint(0, 2 + (x +1)**2)) for x in range(dim_cols)] for _ in range(rows)], columns=[f"dim{x}" for x in list(ascii_uppercase)[:dim_cols]])
-    df_msr = pd.DataFrame([[round(random.random() * 10_000, 2)  for x in range(msr_cols)] for _ in range(rows)], columns=[f"dim{x}" for x in list(ascii_uppercase)[dim_cols:dim_cols+msr_cols]])
+    rng = np.random.default_rng()
+    df_dim = pd.DataFrame()
+    for x in range(dim_cols):
+        members = np.array([mn(n) for n in range(3 + (x + 1)**2)])  # draw member indices, not member names per cell
+        df_dim[f"dim{ascii_uppercase[x]}"] = members[rng.integers(0, len(members), rows)]
+    df_msr = pd.DataFrame(np.round(rng.random((rows, msr_cols)) * 10_000, 2), columns=[f"dim{x}" for x in list(ascii_uppercase)[dim_cols:dim_cols+msr_cols]])
     df = pd.concat([df_dim, df_msr], axis=1)
     if sorted:
         df.sort_values(df.columns.tolist(), inplace=True)
@@ -4,12 +4,11 @@ import pandas as pd
 from nanocube import NanoCube
 
 # Create or load a DataFrame
-# NOTE: `None` values in string columns are not supported,
-# use a string placeholder like 'N/A' or '#NA' instead.
+# Missing values (None, NaN) in dimension columns are addressed as member `None`.
 df = pd.DataFrame({'customer': ['A', 'B', 'A', 'B', 'A'],
                    'product':  ['P1', 'P2', 'P3', 'P1', 'P2'],
                    'promo':    [True, False, True, True, False],
-                   'manager':  ['Ari', '#NA', 'Eve', 'Eve', 'Ari'],
+                   'manager':  ['Ari', None, 'Eve', 'Eve', 'Ari'],
                    'discount': [5, None, None, 20, 25],
                    'sales':    [100, 200, 300, 400, 500],
                    'cost':     [60, 90, 120, 200, 240]})
@@ -21,7 +20,7 @@ print(nc.get(customer='A'))                # {'discount': 30.0, 'sales': 900, 'c
 print(nc.get(product=['P1', 'P2']))        # {'discount': 50.0, 'sales': 1200, 'cost': 590}
 print(nc.get(promo=True))                  # {'discount': 25.0, 'sales': 800, 'cost': 380}
 print(nc.get(manager='Ari'))               # {'discount': 30.0, 'sales': 600, 'cost': 300}
-print(nc.get(manager='#NA'))               # {sales: 800, cost: 380}
+print(nc.get(manager=None))                # {'discount': 0.0, 'sales': 200, 'cost': 90}
 print(nc.get('sales', promo=True))   # 800
 print(nc.get('sales'))                     # 1500 all records
 print(nc.get('sales', 'cost', customer='A'))  # [900, 420]
@@ -74,6 +74,9 @@ setup(
         'lz4',
         'zstandard',
     ],
+    extras_require={
+        'fast': ['numba >= 0.59', 'orjson >= 3.9'],
+    },
     test_suite="nanocube.tests",
     packages=['nanocube'],  # , 'tests'],
     project_urls={
@@ -1,17 +1,25 @@
 # nanocube - Copyright (c)2024, Thomas Zeutschler, MIT license
 
+import os
+import tempfile
 import unittest
+from unittest import mock
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from nanocube import NanoCube
 
 class TestNanoCube(unittest.TestCase):
 
-    def setUp(self):
-        self.df = pd.DataFrame({'customer': ['A', 'B', 'A', 'B', 'A'],
-                           'product': ['P1', 'P2', 'P3', 'P1', 'P2'],
-                           'promo': [True, False, True, True, False],
-                           'sales': [100, 200, 300, 400, 500],
-                           'cost': [60, 90, 120, 200, 240]})
+    @classmethod
+    def setUpClass(cls):
+        # the cubes only read the dataframe, so all tests share one
+        cls.df = pd.DataFrame({'customer': ['A', 'B', 'A', 'B', 'A'],
+                          'product': ['P1', 'P2', 'P3', 'P1', 'P2'],
+                          'promo': [True, False, True, True, False],
+                          'sales': [100, 200, 300, 400, 500],
+                          'cost': [60, 90, 120, 200, 240]})
 
     def test_cube_methods(self):
         cube = NanoCube(self.df)
@@ -22,6 +30,22 @@ class TestNanoCube(unittest.TestCase):
         self.assertEqual(cube.get('sales', promo=True), 800)
         self.assertEqual(cube.get('sales'), 1500)
         self.assertEqual(cube.get('sales', 'cost', customer='A'), [900, 420])
+        self.assertEqual(cube.get('sales', customer='A', aggregate='count'), 3)
+
+        df = pd.DataFrame({'customer': ['A', 'A', 'B'], 'sales': [100, 0, 200]})
+        self.assertEqual(NanoCube(df).get('sales', customer='A', aggregate='count'), 1)
+
+    def test_cube_float_sums(self):
+        # float sums must equal numpy's (pairwise) sums, with or without the optional numba kernels
+        values = np.random.default_rng(0).random(1000) * 1000
+        df = pd.DataFrame({'parity': np.arange(1000) % 2, 'x': values, 'y': values[::-1].copy()})
+        cube = NanoCube(df, dimensions=['parity'], measures=['x', 'y'])
+        self.assertEqual(cube.get('x', parity=0), values[::2].sum())
+        self.assertEqual(cube.compile('x', 'parity')(0), values[::2].sum())
+        sums = [values[::2].sum(), values[::-1][::2].sum()]
+        self.assertEqual(cube.get('x', 'y', parity=0), sums)  # the packed multi-measure path
+        self.assertEqual(cube.compile(['x', 'y'], 'parity')(0), sums)
+        self.assertEqual(cube.get('x', parity=0, aggregate='max'), values[::2].max())
 
     def test_cube_alternative_initializations(self):
         cube = NanoCube(self.df, dimensions=['customer', 'product'], measures=['sales', 'cost'])
@@ -34,6 +58,90 @@ class TestNanoCube(unittest.TestCase):
         self.assertEqual(cube.get(promo=True), {'sales': 800})
         self.assertEqual(cube.get('sales'), 1500)
 
+    def test_cube_missing_members(self):
+        df = pd.DataFrame({'region': ['North', None, float('nan'), 'South'], 'sales': [100, 200, 300, 400]})
+        for indexing_method in ['roaring', 'numpy']:
+            cube = NanoCube(df, indexing_method=indexing_method)
+            self.assertEqual(cube.get('sales', region=None), 500)
+            self.assertEqual(cube.get('sales', region=['North', None]), 600)
+            with tempfile.TemporaryDirectory() as folder:
+                file_name = os.path.join(folder, 'cube.nano')
+                cube.save(file_name)
+                loaded = NanoCube.load(file_name)
+            self.assertEqual(loaded.get('sales', region=None), 500)
+
+    def test_cube_caching(self):
+        cube = NanoCube(self.df, caching=True)
+        self.assertEqual(cube.get('sales', customer='A', product=['P1', 'P2']), 600)
+        self.assertEqual(cube.get('sales', product=['P1', 'P2'], customer='A'), 600)
+        self.assertEqual(cube.get('sales', customer='A', aggregate='max'), 500)
+        self.assertEqual(cube.get('sales', customer='A', aggregate='min'), 100)
+        self.assertEqual(cube.get('sales', customer='A'), 900)
+
+    def test_cube_compile(self):
+        for indexing_method in ['roaring', 'numpy']:
+            cube = NanoCube(self.df, indexing_method=indexing_method)
+            query = cube.compile('sales', ['customer', 'product'])
+            self.assertEqual(query('A', 'P1'), 100)
+            self.assertEqual(query('B', 'P3'), 0)
+            self.assertEqual(cube.compile('sales', 'promo', aggregate='max')(True), 400)
+            self.assertEqual(cube.compile(['sales', 'cost'], 'customer')('A'), [900, 420])
+            self.assertEqual(cube.compile('sales', [])(), 1500)
+            with self.assertRaises(TypeError):
+                query('A')
+
+    def test_cube_compile_mixed_dtypes(self):
+        # differently typed measures are not upcast to a common dtype, compile() returns the same as get()
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({'customer': np.arange(1000) % 3,
+                           'q': rng.integers(0, 1 << 40, 1000), 'p': rng.random(1000) * 100,
+                           'u': rng.integers(0, 1000, 1000).astype(np.uint64),
+                           'f': (rng.random(1000) * 100).astype(np.float32)})
+        cube = NanoCube(df, dimensions=['customer'], measures=['q', 'p', 'u', 'f'])
+        for measures in [['q', 'p'], ['q', 'u'], ['q', 'f'], ['f']]:
+            for aggregate in ['sum', 'min', 'max']:
+                for dimensions, members in [(['customer'], (1,)), ([], ())]:
+                    result = cube.compile(measures, dimensions, aggregate=aggregate)(*members)
+                    expected = cube.get(*measures, aggregate=aggregate, **dict(zip(dimensions, members)))
+                    self.assertEqual(result, expected)
+                    types = lambda values: [type(v) for v in (values if isinstance(values, list) else [values])]
+                    self.assertEqual(types(result), types(expected))
+
+    def test_cube_save_and_load(self):
+        for indexing_method in ['roaring', 'numpy']:
+            cube = NanoCube(self.df, dimensions=['customer', 'product', 'promo'], measures=['sales', 'cost'],
+                            indexing_method=indexing_method)
+            with tempfile.TemporaryDirectory() as folder:
+                file_name = os.path.join(folder, 'cube.nano')
+                cube.save(file_name)
+                loaded = NanoCube.load(file_name)
+            self.assertEqual(loaded.get(customer='A', product='P1'), {'sales': 100, 'cost': 60})
+            self.assertEqual(loaded.get(customer='A'), {'sales': 900, 'cost': 420})
+            self.assertEqual(loaded.get(product=['P1', 'P2']), {'sales': 1200, 'cost': 590})
+            self.assertEqual(loaded.get('sales', 'cost', customer='A'), [900, 420])
+            self.assertEqual(loaded.get('sales'), 1500)
+            self.assertEqual(loaded.get('sales', promo=True), 800)
+
+    def test_cube_load_unsupported_version(self):
+        with tempfile.TemporaryDirectory() as folder:
+            file_name = os.path.join(folder, 'cube.nano')
+            # the layout of files saved by NanoCube 0.1.2, one binary column of compressed blobs
+            table = pa.table({'data': pa.array([b'meta', b'bitmaps'])})
+            pq.write_table(table.replace_schema_metadata({'app': 'NanoCube', 'version': '0.1.2'}), file_name)
+            with self.assertRaisesRegex(ValueError, "Unsupported NanoCube file format version '0.1.2'"):
+                NanoCube.load(file_name)
+
+    def test_cube_load_in_parallel(self):
+        for indexing_method in ['roaring', 'numpy']:
+            cube = NanoCube(self.df, indexing_method=indexing_method)
+            with tempfile.TemporaryDirectory() as folder:
+                file_name = os.path.join(folder, 'cube.nano')
+                cube.save(file_name)
+                with mock.patch('os.cpu_count', return_value=4):  # decompress the dimensions on multiple threads
+                    loaded = NanoCube.load(file_name)
+            self.assertEqual(loaded.get(customer='A', product='P1'), {'sales': 100, 'cost': 60})
+            self.assertEqual(loaded.get('sales', 'cost', promo=True), [800, 380])
+
 
 if __name__ == '__main__':
     unittest.main()
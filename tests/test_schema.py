@@ -0,0 +1,26 @@
+# nanocube - Copyright (c)2024, Thomas Zeutschler, MIT license
+
+import unittest
+from nanocube.schema import Schema, SchemaDimension, SchemaMeasure
+
+class TestSchema(unittest.TestCase):
+
+    def test_schema_initialization(self):
+        schema = Schema(dimensions=['customer', 'product'], measures=['sales', 'cost'])
+        self.assertEqual([d.column for d in schema.dimensions], ['customer', 'product'])
+        self.assertEqual([m.column for m in schema.measures], ['sales', 'cost'])
+        self.assertTrue(all(isinstance(d, SchemaDimension) for d in schema.dimensions))
+        self.assertTrue(all(isinstance(m, SchemaMeasure) for m in schema.measures))
+
+        schema = Schema(dimensions='customer', measures=SchemaMeasure(ordinal=0, column='sales'))
+        self.assertEqual(schema.dimensions, [SchemaDimension(ordinal=0, column='customer')])
+        self.assertEqual(schema.measures, [SchemaMeasure(ordinal=0, column='sales')])
+
+        with self.assertRaises(ValueError):
+            Schema(dimensions=42)
+        with self.assertRaises(ValueError):
+            Schema(dimensions=['customer'], measures=42)
+
+
+if __name__ == '__main__':
+    unittest.main()